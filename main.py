@@ -5,12 +5,12 @@ VS Code friendly script: saves CSV outputs and PNG plots.
 """
 
 import os, warnings, sys, random
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use("Agg")  # headless save
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+# matplotlib/seaborn are imported on first use (lazy_plt), not at startup
+plt = sns = None
 
 # ---------------- Config ----------------
 DATA_DIR = os.path.join("data_raw")
@@ -25,83 +25,182 @@ HEART_CSV  = os.path.join(DATA_DIR, "heartrate_seconds_merged.csv")
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 pd.set_option("display.max_columns", 200)
-sns.set(style="whitegrid", context="notebook")
+if int(pd.__version__.split(".")[0]) < 3:  # always on (and the option deprecated) from pandas 3
+    pd.set_option("mode.copy_on_write", True)
 
 def log(msg): 
     print(f"[Fitbit-EDA] {msg}")
 
 # ---------------- Load ----------------
-def read_csv_safe(path):
+def read_csv_safe(path, usecols=None, dtype=None, parse_dates=None, date_format=None, chunksize=None):
     if not os.path.exists(path):
         log(f"Missing file: {path}")
         return None
     try:
-        return pd.read_csv(path)
+        # keep only requested columns that actually exist, so an absent optional
+        # column (Time vs ActivitySecond) doesn't fail the whole read
+        header = pd.read_csv(path, nrows=0).columns
+        if usecols is not None:
+            usecols = [c for c in header if c in usecols]
+        if dtype is not None:
+            dtype = {c: t for c, t in dtype.items() if c in header}
+        if parse_dates is not None:
+            parse_dates = [c for c in parse_dates if c in header]
+        return pd.read_csv(path, usecols=usecols, dtype=dtype, parse_dates=parse_dates,
+                           date_format=date_format, chunksize=chunksize)
     except Exception as e:
         log(f"Failed to read {path}: {e}")
         return None
 
-daily  = read_csv_safe(DAILY_CSV)
-sleep  = read_csv_safe(SLEEP_CSV)
-weight = read_csv_safe(WEIGHT_CSV)
-heart  = read_csv_safe(HEART_CSV)
+DAILY_COLS  = ["Id","ActivityDate","TotalSteps","Calories","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes"]
+SLEEP_COLS  = ["Id","SleepDay","TotalMinutesAsleep"]
+WEIGHT_COLS = ["Id","Date","WeightKg","BMI"]
+HEART_COLS  = ["Id","Time","ActivitySecond","Value"]
+
+DATE_FMT    = "%m/%d/%Y"
+DT12_FMT    = "%m/%d/%Y %I:%M:%S %p"
+DT24_FMT    = "%m/%d/%Y %H:%M:%S"
+
+daily  = read_csv_safe(DAILY_CSV,  usecols=DAILY_COLS,
+                       parse_dates=["ActivityDate"], date_format=DATE_FMT)
+sleep  = read_csv_safe(SLEEP_CSV,  usecols=SLEEP_COLS,
+                       parse_dates=["SleepDay"], date_format=DT12_FMT)
+weight = read_csv_safe(WEIGHT_CSV, usecols=WEIGHT_COLS,
+                       parse_dates=["Date"], date_format=DT12_FMT)
 
-for name, df in {"daily":daily,"sleep":sleep,"weight":weight,"heart":heart}.items():
+for name, df in {"daily":daily,"sleep":sleep,"weight":weight}.items():
     if df is None:
         log(f"WARNING: {name} not loaded")
 
 def norm_id(df):
     if df is None or "Id" not in df.columns:
         return df
-    return df.assign(Id=pd.to_numeric(df["Id"], errors="coerce").astype("Int64").astype(str))
+    if pd.api.types.is_integer_dtype(df["Id"]):
+        return df  # parser already produced integer Ids; nothing to convert
+    return df.assign(Id=pd.to_numeric(df["Id"], errors="coerce").astype("Int64"))
 
 daily  = norm_id(daily)
 sleep  = norm_id(sleep)
 weight = norm_id(weight)
-heart  = norm_id(heart)
 
 # ---------------- Parse dates ----------------
+# Dates are parsed on read; read_csv leaves a column as strings when it doesn't
+# match date_format, so only those columns get a second (coercing) pass here.
+def ensure_datetime(df, col, fmt):
+    if not pd.api.types.is_datetime64_any_dtype(df[col]):
+        df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce")
+
+def floor_day(s):
+    """Day-truncate a datetime64 Series with integer arithmetic on its buffer (NaT kept)."""
+    v = s.to_numpy()
+    step = np.timedelta64(1, "D") // np.timedelta64(1, np.datetime_data(v.dtype)[0])
+    day = (v.view("int64") // step * step).view(v.dtype)
+    day[np.isnat(v)] = np.datetime64("NaT")
+    return day
+
 if daily is not None and "ActivityDate" in daily.columns:
-    daily["ActivityDate"] = pd.to_datetime(daily["ActivityDate"], format="%m/%d/%Y", errors="coerce")
+    ensure_datetime(daily, "ActivityDate", DATE_FMT)
     daily["date"] = daily["ActivityDate"].dt.normalize()
 
 if sleep is not None and "SleepDay" in sleep.columns:
-    sleep["SleepDay"] = pd.to_datetime(sleep["SleepDay"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    ensure_datetime(sleep, "SleepDay", DT12_FMT)
     sleep["date"] = sleep["SleepDay"].dt.normalize()
 
 if weight is not None and "Date" in weight.columns:
-    try:
-        weight["Date"] = pd.to_datetime(weight["Date"], format="%m/%d/%Y %I:%M:%S %p", errors="raise")
-    except Exception:
-        weight["Date"] = pd.to_datetime(weight["Date"], format="%m/%d/%Y %H:%M:%S", errors="coerce")
-
-if heart is not None:
-    time_col = "Time" if "Time" in heart.columns else ("ActivitySecond" if "ActivitySecond" in heart.columns else None)
-    if time_col is not None:
-        try:
-            heart[time_col] = pd.to_datetime(heart[time_col], format="%m/%d/%Y %I:%M:%S %p", errors="raise")
-        except Exception:
-            heart[time_col] = pd.to_datetime(heart[time_col], format="%m/%d/%Y %H:%M:%S", errors="coerce")
-        heart["date"] = heart[time_col].dt.normalize()
-    else:
-        log("WARNING: Heart file missing Time/ActivitySecond column")
+    ensure_datetime(weight, "Date", DT24_FMT)
 
 # ---------------- Dedupe ----------------
-for d in [daily, sleep]:
-    if d is not None and "Id" in d.columns and "date" in d.columns:
-        d.sort_values(["Id","date"], inplace=True)
-        d.drop_duplicates(["Id","date"], keep="first", inplace=True)
+# one hash pass keeping the first row per (Id, date); no pre-sort needed
+def dedupe(d):
+    if d is None or "Id" not in d.columns or "date" not in d.columns:
+        return d
+    return d.drop_duplicates(["Id","date"], keep="first", ignore_index=True)
+
+daily = dedupe(daily)
+sleep = dedupe(sleep)
 
 # ---------------- HR daily agg ----------------
-if heart is not None and "Value" in heart.columns and "Id" in heart.columns and "date" in heart.columns:
-    hr_day = (heart.groupby(["Id","date"], as_index=False, observed=True)
-                .agg(AvgHR=("Value","mean"),
-                     MaxHR=("Value","max"),
-                     MinHR=("Value","min"),
-                     HRCount=("Value","size")))
+HR_CHUNK = 1_000_000
+HR_COLS  = ["Id","date","AvgHR","MaxHR","MinHR","HRCount"]
+
+def hr_partial_agg(heart):
+    """Per (Id, date) sum/count/max/min/size of Value via bincount + ufunc.at, no groupby dispatch.
+
+    Matches groupby: NaN Values are skipped by sum/count/max/min but counted in the size
+    (HRCount); HRValid carries the non-NaN count so AvgHR stays exact across chunks.
+    """
+    id_codes, ids = pd.factorize(heart["Id"], sort=True)
+    day_codes, days = pd.factorize(heart["date"], sort=True)
+    ok = (id_codes >= 0) & (day_codes >= 0)  # groupby drops NA keys
+    nd = max(len(days), 1)
+    codes, uniq = pd.factorize(id_codes[ok].astype("int64") * nd + day_codes[ok], sort=True)
+    vals = heart["Value"].to_numpy()[ok]
+    n = len(uniq)
+    if vals.dtype.kind in "iu":  # NaN-free chunk narrowed to int16 on load
+        info = np.iinfo(vals.dtype)
+        hi = np.full(n, info.min, dtype=vals.dtype); np.maximum.at(hi, codes, vals)
+        lo = np.full(n, info.max, dtype=vals.dtype); np.minimum.at(lo, codes, vals)
+        notna = slice(None)
+    else:
+        # chunk with blank Values: fmax/fmin skip NaN like groupby max/min
+        vals = vals.astype("float64")
+        hi = np.full(n, np.nan); np.fmax.at(hi, codes, vals)
+        lo = np.full(n, np.nan); np.fmin.at(lo, codes, vals)
+        notna = ~np.isnan(vals)
+    return pd.DataFrame({
+        "Id": ids[uniq // nd],
+        "date": days[uniq % nd],
+        "HRSum": np.bincount(codes[notna], weights=vals[notna], minlength=n),
+        "HRValid": np.bincount(codes[notna], minlength=n),
+        "MaxHR": hi,
+        "MinHR": lo,
+        "HRCount": np.bincount(codes, minlength=n),
+    })
+
+def load_hr_day(path):
+    """Stream the second-level HR file in chunks, folding per-chunk partials into daily stats."""
+    # no forced dtypes: a blank Id/Value cell must not fail the whole read
+    chunks = read_csv_safe(path, usecols=HEART_COLS,
+                           parse_dates=["Time","ActivitySecond"], date_format=DT12_FMT,
+                           chunksize=HR_CHUNK)
+    if chunks is None:
+        return None
+    parts = []
+    try:
+        for chunk in chunks:
+            time_col = "Time" if "Time" in chunk.columns else ("ActivitySecond" if "ActivitySecond" in chunk.columns else None)
+            if time_col is None or "Value" not in chunk.columns or "Id" not in chunk.columns:
+                log("WARNING: Heart file missing Id/Value/Time/ActivitySecond column")
+                return None
+            chunk = norm_id(chunk)
+            v = chunk["Value"]
+            # heart rate fits in int16; only integer (NaN-free) chunks are narrowed
+            if pd.api.types.is_integer_dtype(v) and v.between(-2**15, 2**15 - 1).all():
+                chunk["Value"] = v.astype("int16")
+            ensure_datetime(chunk, time_col, DT24_FMT)
+            chunk["date"] = floor_day(chunk[time_col])
+            parts.append(hr_partial_agg(chunk))
+    except Exception as e:
+        log(f"Failed to read {path}: {e}")
+        return None
+    if not parts:
+        return pd.DataFrame(columns=HR_COLS)
+    out = pd.concat(parts, ignore_index=True)
+    if len(parts) > 1:
+        # an (Id, date) group can straddle chunk boundaries
+        out = (out.groupby(["Id","date"], as_index=False, sort=True)
+                  .agg(HRSum=("HRSum","sum"), HRValid=("HRValid","sum"),
+                       MaxHR=("MaxHR","max"), MinHR=("MinHR","min"),
+                       HRCount=("HRCount","sum")))
+    out["AvgHR"] = out["HRSum"] / out["HRValid"]
+    return out[HR_COLS]
+
+hr_day = load_hr_day(HEART_CSV)
+if hr_day is not None:
     hr_day[["AvgHR","MaxHR","MinHR"]] = hr_day[["AvgHR","MaxHR","MinHR"]].round(1)
 else:
-    hr_day = pd.DataFrame(columns=["Id","date","AvgHR","MaxHR","MinHR","HRCount"])
+    log("WARNING: heart not loaded")
+    hr_day = pd.DataFrame(columns=HR_COLS)
 log(f"hr_day rows: {len(hr_day)}")
 
 # ---------------- Build analysis df ----------------
@@ -111,49 +210,110 @@ def safe_cols(df, cols):
 keep = ["Id","date","TotalSteps","Calories","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes"]
 df = daily[safe_cols(daily, keep)].copy() if daily is not None else pd.DataFrame(columns=keep)
 
+DAY_NS = 86_400_000_000_000
+
+def join_key(frame):
+    """Single int64 (Id, day) key so joins hash one integer column; -1 for missing Id/date."""
+    ids = frame["Id"].to_numpy(dtype="int64", na_value=-1)
+    ns = frame["date"].to_numpy(dtype="datetime64[ns]")
+    # 20 bits of day number (through year ~4840) leaves 43 bits for the Id
+    if len(ids) and ids.max() >= 1 << 43:
+        raise ValueError(f"Id {ids.max()} too large for the int64 (Id, day) join key")
+    key = (ids << 20) + ns.view("int64") // DAY_NS
+    key[(ids < 0) | np.isnat(ns)] = -1
+    return key
+
+def keyed(frame, cols):
+    # one row per (Id, date) after dedupe/aggregation, so the key index is unique
+    out = frame[safe_cols(frame, cols)].set_index(pd.Index(join_key(frame), name="_key"))
+    return out[out.index >= 0]
+
+# sleep and hr_day share the unique key index: one column-stacking concat, then a
+# single reindex onto the daily rows (left-join semantics) instead of two merges
+extra = [keyed(hr_day, ["AvgHR","MaxHR","MinHR","HRCount"])]
 if sleep is not None:
-    df = df.merge(sleep[safe_cols(sleep, ["Id","date","TotalMinutesAsleep"])], on=["Id","date"], how="left")
-df = df.merge(hr_day, on=["Id","date"], how="left")
-
-num_cols = ["TotalSteps","Calories","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes",
-            "TotalMinutesAsleep","AvgHR","MaxHR","MinHR","HRCount"]
-for c in num_cols:
-    if c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
+    extra.insert(0, keyed(sleep, ["TotalMinutesAsleep"]))
+extra = pd.concat(extra, axis=1, join="outer").reindex(join_key(df))
+df = pd.concat([df, extra.reset_index(drop=True)], axis=1)
+
+# coerce and downcast in one pass: counts/minutes to the smallest int (stays
+# float64 when NaN is present), whole-kcal Calories to float32 (exact). HR stats
+# are 0.1-rounded and float32 can't hold those exactly, so they stay float64.
+int_cols   = ["TotalSteps","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes",
+              "TotalMinutesAsleep","HRCount"]
+float_cols = ["Calories"]
+f64_cols   = ["AvgHR","MaxHR","MinHR"]
+
+def downcast(frame):
+    for c in int_cols:
+        if c in frame.columns:
+            frame[c] = pd.to_numeric(frame[c], errors="coerce", downcast="integer")
+    for c in float_cols:
+        if c in frame.columns:
+            frame[c] = pd.to_numeric(frame[c], errors="coerce", downcast="float")
+    for c in f64_cols:
+        if c in frame.columns:
+            frame[c] = pd.to_numeric(frame[c], errors="coerce")
+    return frame
+
+df = downcast(df)
+
+WEEKDAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
 if "date" in df.columns:
-    df["weekday"] = pd.to_datetime(df["date"]).dt.day_name()
+    dates = df["date"] if pd.api.types.is_datetime64_any_dtype(df["date"]) else pd.to_datetime(df["date"])
+    # 7-category Categorical (int8 codes) instead of an object column of day names
+    dow = dates.dt.dayofweek.fillna(-1).to_numpy().astype("int8")
+    df["weekday"] = pd.Categorical.from_codes(dow, categories=WEEKDAYS)
 
 # QC flags
 cal_median = df["Calories"].median(skipna=True) if "Calories" in df.columns else np.nan
-df["zero_step_high_cal"] = (df.get("TotalSteps",0)==0) & (df.get("Calories",0)>cal_median)
-df["valid_row"] = ~df["zero_step_high_cal"]
-df_valid = df[df["valid_row"]].copy()
+# drop zero-step/high-calorie days; mask built once on the raw arrays
+steps = df["TotalSteps"].to_numpy() if "TotalSteps" in df.columns else np.zeros(len(df))
+cal   = df["Calories"].to_numpy() if "Calories" in df.columns else np.zeros(len(df))
+valid = ~((steps == 0) & (cal > cal_median))
+df_valid = df.iloc[valid]  # copy-on-write: added columns don't touch df
 log(f"df_valid rows: {len(df_valid)}")
 
 # ---------------- Aggregations ----------------
-def groupmean(frame, by, cols):
-    if frame.empty: 
-        return pd.DataFrame(columns=[by]+cols)
-    out = frame.groupby(by, as_index=False, observed=True).agg({c:"mean" for c in cols})
-    return out
-
-agg_by_date = groupmean(
-    df_valid, "date",
-    ["TotalSteps","Calories","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes",
-     "TotalMinutesAsleep","AvgHR"]
-)
-
-agg_by_weekday = groupmean(
-    df_valid, "weekday",
-    ["TotalSteps","Calories","TotalMinutesAsleep","AvgHR"]
-)
+def groupsums(frame, by, cols):
+    """Per-group sums and non-null counts: mean = sums / counts, and both roll up exactly."""
+    if frame.empty:
+        empty = pd.DataFrame(columns=cols, index=pd.Index([], name=by))
+        return empty, empty
+    # observed=True: categorical keys (weekday, steps_bucket) must not expand to
+    # the full category cross product when more keys are added
+    # sort=True: agg_by_date comes out date-ordered, so the time-series plots needn't re-sort
+    g = frame.groupby(by, observed=True, sort=True)[cols]
+    return g.sum(), g.count()
+
+date_cols = ["TotalSteps","Calories","SedentaryMinutes","VeryActiveMinutes","LightlyActiveMinutes",
+             "TotalMinutesAsleep","AvgHR"]
+wk_cols   = ["TotalSteps","Calories","TotalMinutesAsleep","AvgHR"]
+
+# One pass over df_valid by date; weekday is a function of date, so agg_by_weekday
+# is rolled up from the small per-date sums/counts (count-weighted, same means as
+# grouping the rows directly).
+sums, cnts = groupsums(df_valid, "date", safe_cols(df_valid, date_cols))
+agg_by_date = (sums / cnts).reset_index()
+
+wk = safe_cols(sums, wk_cols)
+if len(sums):
+    dow = pd.CategoricalIndex(pd.Categorical.from_codes(sums.index.dayofweek, categories=WEEKDAYS),
+                              name="weekday")
+    agg_by_weekday = (sums[wk].groupby(dow, observed=True).sum()
+                      / cnts[wk].groupby(dow, observed=True).sum()).reset_index()
+else:
+    agg_by_weekday = pd.DataFrame(columns=["weekday"]+wk)
 
 # Step segments
 bins = [-1, 5000, 10000, np.inf]
 labels = ["<5k","5k-10k",">10k"]
 if "TotalSteps" in df_valid.columns:
-    df_valid["steps_bucket"] = pd.cut(df_valid["TotalSteps"], bins=bins, labels=labels, include_lowest=True, ordered=True)
+    # same right-closed bins as pd.cut(include_lowest=True), straight to int8 codes
+    st = df_valid["TotalSteps"].to_numpy(dtype="float64", na_value=np.nan)
+    codes = np.searchsorted(bins[1:-1], st, side="left").astype("int8")
+    codes[np.isnan(st) | (st < bins[0])] = -1
+    df_valid["steps_bucket"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
 else:
     df_valid["steps_bucket"] = pd.Categorical([])
 
@@ -163,49 +323,100 @@ seg = (df_valid.groupby("steps_bucket", as_index=False, observed=True)
             SedentaryMinutes=("SedentaryMinutes","mean"),
             AvgHR=("AvgHR","mean"))).round(1)
 
-# ---------------- Save CSVs ----------------
-def save_csv(obj, name):
-    path = os.path.join(OUT_DIR, name)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+# ---------------- Save tables ----------------
+def save_table(obj, name, fmt="parquet"):
+    """Write obj to OUT_DIR/<name>.<fmt>; parquet falls back to CSV without pyarrow."""
+    base = os.path.join(OUT_DIR, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    if fmt == "parquet":
+        path = base + ".parquet"
+        try:
+            obj.to_parquet(path, engine="pyarrow", compression="snappy", index=False)
+            log(f"Saved: {path}")
+            return
+        except ImportError:
+            log("pyarrow not installed; writing CSV instead")
+    path = base + ".csv"
     obj.to_csv(path, index=False, encoding="utf-8")
     log(f"Saved: {path}")
 
-save_csv(df_valid, "clean_daily_sleep.csv")
-save_csv(agg_by_date, "agg_by_date.csv")
-save_csv(agg_by_weekday, "agg_by_weekday.csv")
-save_csv(seg, "segments_steps.csv")
-save_csv(hr_day, "heartrate_daily.csv")
+# the two large frames go to parquet; the small summaries stay CSV
+save_table(df_valid, "clean_daily_sleep")
+save_table(agg_by_date, "agg_by_date", fmt="csv")
+save_table(agg_by_weekday, "agg_by_weekday", fmt="csv")
+save_table(seg, "segments_steps", fmt="csv")
+save_table(hr_day, "heartrate_daily")
 
 # ---------------- Plots (headless) ----------------
+def lazy_plt():
+    global plt, sns
+    if plt is not None:
+        return
+    import matplotlib
+    matplotlib.use("Agg")  # headless save
+    import matplotlib.pyplot as _plt
+    import seaborn as _sns
+    _sns.set(style="whitegrid", context="notebook")
+    plt, sns = _plt, _sns
+
+# Figures are built sequentially (pyplot state isn't thread-safe) and queued;
+# layout + PNG encoding run together in a thread pool at the end.
+pending_figs = []
+
 def savefig(fig, name):
+    pending_figs.append((fig, name))
+
+def save_one(fig, name):
     fig.tight_layout()
     path = os.path.join(PLOT_DIR, name)
     fig.savefig(path, dpi=150)
-    plt.close(fig)
-    log(f"Saved plot: {path}")
+    return path
+
+def flush_figs():
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for path in ex.map(lambda p: save_one(*p), pending_figs):
+            log(f"Saved plot: {path}")
+    for fig, _ in pending_figs:
+        plt.close(fig)
+    pending_figs.clear()
+
+def scatter_fit(ax, frame, x, y):
+    # scatter + OLS line via np.polyfit; replaces sns.regplot and its bootstrap CI band
+    xv = frame[x].to_numpy(dtype="float64", na_value=np.nan)
+    yv = frame[y].to_numpy(dtype="float64", na_value=np.nan)
+    ok = np.isfinite(xv) & np.isfinite(yv)
+    xv, yv = xv[ok], yv[ok]
+    ax.scatter(xv, yv, alpha=0.25, s=12)
+    if len(xv) > 1 and np.ptp(xv) > 0:
+        slope, intercept = np.polyfit(xv, yv, 1)
+        xs = np.array([xv.min(), xv.max()])
+        ax.plot(xs, slope*xs + intercept, color="red")
+    ax.set_xlabel(x); ax.set_ylabel(y)
+
+if any(not t.empty for t in (agg_by_date, df_valid, agg_by_weekday, seg)):
+    lazy_plt()
+
+# shared scatter sample for plots 2 and 7
+samp = df_valid.iloc[np.random.default_rng(42).choice(len(df_valid), size=min(1500, len(df_valid)), replace=False)]
 
 # 1) Steps over time
 if not agg_by_date.empty and "TotalSteps" in agg_by_date.columns:
     fig, ax = plt.subplots(figsize=(10,4))
-    t = agg_by_date.sort_values("date")
-    ax.plot(t["date"], t["TotalSteps"], color="#1f77b4", linewidth=2)
+    ax.plot(agg_by_date["date"], agg_by_date["TotalSteps"], color="#1f77b4", linewidth=2)
     ax.set_title("Average Daily Steps"); ax.set_xlabel("Date"); ax.set_ylabel("Steps")
     savefig(fig, "steps_over_time.png")
 
 # 2) Calories vs Steps
 if not df_valid.empty:
     fig, ax = plt.subplots(figsize=(6,5))
-    samp = df_valid.sample(min(3000, len(df_valid)), random_state=42)
-    sns.regplot(data=samp, x="TotalSteps", y="Calories",
-                scatter_kws={"alpha":0.25, "s":12}, line_kws={"color":"red"}, ax=ax)
+    scatter_fit(ax, samp, "TotalSteps", "Calories")
     ax.set_title("Calories vs Steps")
     savefig(fig, "calories_vs_steps.png")
 
 # 3) Weekday bars
 if not agg_by_weekday.empty:
-    order = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
     w = (agg_by_weekday.set_index("weekday")
-         .reindex(order)
+         .reindex(WEEKDAYS)
          .reset_index())
     fig, ax = plt.subplots(1,2, figsize=(12,4), sharex=True)
     sns.barplot(data=w, x="weekday", y="TotalSteps", ax=ax[0], color="#1f77b4")
@@ -226,8 +437,7 @@ if not seg.empty:
 # 5) Average HR over time
 if "AvgHR" in agg_by_date.columns and agg_by_date["AvgHR"].notna().any():
     fig, ax = plt.subplots(figsize=(10,4))
-    t = agg_by_date.sort_values("date")
-    ax.plot(t["date"], t["AvgHR"], color="#ff7f0e", linewidth=2)
+    ax.plot(agg_by_date["date"], agg_by_date["AvgHR"], color="#ff7f0e", linewidth=2)
     ax.set_title("Average Daily Heart Rate"); ax.set_xlabel("Date"); ax.set_ylabel("Avg HR (bpm)")
     savefig(fig, "avg_hr_over_time.png")
 
@@ -242,10 +452,10 @@ if "TotalMinutesAsleep" in df_valid.columns and df_valid["TotalMinutesAsleep"].n
 # 7) Sedentary vs Steps
 if not df_valid.empty:
     fig, ax = plt.subplots(figsize=(6,5))
-    samp = df_valid.sample(min(3000, len(df_valid)), random_state=42)
-    sns.regplot(data=samp, x="TotalSteps", y="SedentaryMinutes",
-                scatter_kws={"alpha":0.25, "s":12}, line_kws={"color":"red"}, ax=ax)
+    scatter_fit(ax, samp, "TotalSteps", "SedentaryMinutes")
     ax.set_title("Sedentary Minutes vs Steps")
     savefig(fig, "sedentary_vs_steps.png")
 
+flush_figs()
+
 log(f"Done. Outputs in: {OUT_DIR}")
\ No newline at end of file